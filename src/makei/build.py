@@ -4,11 +4,17 @@
 # 57XX-XXX
 # (c) Copyright IBM Corp. 2021
 """ The module used to build a project"""
+import hashlib
+import os
+import re
+import shlex
 import sys
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
 from tempfile import mkstemp
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+from makei import __version__
 from makei.const import BOB_PATH, MK_PATH
 from makei.ibmi_json import IBMiJson
 from makei.iproj_json import IProjJson
@@ -16,6 +22,66 @@ from makei.rules_mk import RulesMk
 from makei.utils import objlib_to_path, \
     run_command, support_color, print_to_stdout, Colors, colored
 
+BUILD_VARS_DIGEST = Path(".logs") / "build_vars.digest"
+BUILD_VARS_CACHE = Path(".logs") / "build_vars.mk.cached"
+# Environment variable references resolved by parse_all_variables, e.g. "&OBJLIB/dir"
+_ENV_VAR_RE = re.compile(rb'&([^/"\\]+)')
+# Number of threads used to read and write the per-directory project files
+IO_WORKERS = 8
+# Files looked up in the project tree when generating the build variables
+PROJECT_FILES = ("Rules.mk", ".ibmi.json")
+# Directories that never contain project files and are not walked into
+PRUNED_DIRS = frozenset({".git", ".hg", ".svn", "node_modules", ".venv", "venv", "__pycache__", ".tox",
+                         ".mypy_cache", ".deps", ".evfevent", ".logs"})
+
+_io_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_io_executor() -> ThreadPoolExecutor:
+    """ Returns the thread pool used for file I/O, it is shared by every BuildEnv."""
+    global _io_executor  # pylint: disable=global-statement
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS)
+    return _io_executor
+
+
+def _scan_project(root: str, names: Tuple[str, ...] = PROJECT_FILES) -> Dict[str, List[str]]:
+    """ Returns the paths of the files under root with the given names, grouped by name.
+
+    The whole tree is walked once with os.scandir, so the entry type comes
+    from the directory listing instead of a stat call per entry.
+    Symlinked directories and directories in PRUNED_DIRS are not followed,
+    directories that cannot be read are skipped like Path.rglob does.
+    """
+    result: Dict[str, List[str]] = {name: [] for name in names}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            scandir_it = os.scandir(directory)
+        except OSError:
+            continue
+        with scandir_it as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in PRUNED_DIRS:
+                        stack.append(entry.path)
+                elif entry.name in result:
+                    result[entry.name].append(entry.path)
+    return result
+
+
+def _atomic_write(path: Path, data: bytes):
+    """ Writes data to a temporary file next to path and moves it into place."""
+    fd, tmp_path = mkstemp(dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+
 
 class BuildEnv:
     """ The Build Environment used to build or compile a project. """
@@ -25,10 +91,11 @@ class BuildEnv:
     src_dir: Path
     targets: List[str]
     make_options: Optional[str]
+    make_option_args: List[str]
     bob_path: Path
     bob_makefile: Path
     build_vars_path: Path
-    build_vars_handle: Path
+    build_vars_handle: Optional[int]
     curlib: str
     pre_usr_libl: str
     post_usr_libl: str
@@ -36,7 +103,7 @@ class BuildEnv:
     iproj_json: IProjJson
     ibmi_env_cmds: str
 
-    tmp_files: List[Path] = []
+    tmp_files: List[str]
 
     success_targets: List[str]
     failed_targets: List[str]
@@ -47,60 +114,109 @@ class BuildEnv:
         self.src_dir = Path.cwd()
         self.targets = targets if targets is not None else ["all"]
         self.make_options = make_options if make_options else ""
+        try:
+            self.make_option_args = shlex.split(self.make_options)
+        except ValueError as error:
+            print(colored(f"Invalid make options '{self.make_options}': {error}", Colors.FAIL))
+            sys.exit(1)
         self.bob_path = Path(
             overrides["bob_path"]) if "bob_path" in overrides else BOB_PATH
         self.bob_makefile = MK_PATH / 'Makefile'
-        self.build_vars_handle, path = mkstemp()
-        self.build_vars_path = Path(path)
         self.iproj_json_path = self.src_dir / "iproj.json"
         self.iproj_json = IProjJson.from_file(self.iproj_json_path)
-        self.color = support_color()
+        self.tmp_files = []
+        self.build_vars_handle, path = mkstemp()
+        self.build_vars_path = Path(path)
+        try:
+            self.color = support_color()
 
-        if len(self.iproj_json.set_ibm_i_env_cmd) > 0:
-            cmd_list = self.iproj_json.set_ibm_i_env_cmd
-            self.ibmi_env_cmds = "\\n".join(cmd_list)
-        else:
-            self.ibmi_env_cmds = ""
+            if len(self.iproj_json.set_ibm_i_env_cmd) > 0:
+                cmd_list = self.iproj_json.set_ibm_i_env_cmd
+                self.ibmi_env_cmds = "\\n".join(cmd_list)
+            else:
+                self.ibmi_env_cmds = ""
 
-        self.success_targets = []
-        self.failed_targets = []
+            self.success_targets = []
+            self.failed_targets = []
 
-        self._create_build_vars()
+            self._create_build_vars()
+        except BaseException:
+            # __exit__ is never called when the constructor fails
+            self.__exit__()
+            raise
 
-    def __del__(self):
-        self.build_vars_path.unlink()
+    def __enter__(self) -> "BuildEnv":
+        return self
 
-    def generate_make_cmd(self):
-        """ Returns the make command used to build the project."""
-        cmd = f'/QOpenSys/pkgs/bin/make -k BUILDVARSMKPATH="{self.build_vars_path}"' + \
-              f' -k BOB="{self.bob_path}" -f "{self.bob_makefile}"'
-        if self.make_options:
-            cmd = f"{cmd} {self.make_options}"
-        cmd = f"{cmd} {' '.join(self.targets)}"
-        return cmd
+    def __exit__(self, *exc_info):
+        if self.build_vars_handle is not None:
+            os.close(self.build_vars_handle)
+            self.build_vars_handle = None
+        self.build_vars_path.unlink(missing_ok=True)
+        self._remove_tmp_files()
+
+    def _remove_tmp_files(self):
+        """ Removes the generated .Rules.mk.build files that are still on disk."""
+        for tmp_file in self.tmp_files:
+            Path(tmp_file).unlink(missing_ok=True)
+        self.tmp_files = []
+
+    def generate_make_cmd(self) -> str:
+        """ Returns the make command used to build the project as a shell command line."""
+        return shlex.join(self.generate_make_argv())
+
+    def generate_make_argv(self) -> List[str]:
+        """ Returns the arguments of the make command used to build the project."""
+        argv = ["/QOpenSys/pkgs/bin/make", "-k", f"BUILDVARSMKPATH={self.build_vars_path}",
+                "-k", f"BOB={self.bob_path}", "-f", str(self.bob_makefile)]
+        argv.extend(self.make_option_args)
+        argv.extend(self.targets)
+        return argv
 
     def _create_build_vars(self):
-        target_file_path = self.build_vars_path
+        project_files = _scan_project(".")
+        rules_mk_paths = project_files["Rules.mk"]
+        subdirs = [os.path.dirname(path) for path in rules_mk_paths]
+
+        def create_rules_mk_build(rules_mk_path: str, rules_mk_build_path: str):
+            rules_mk = RulesMk.from_file(Path(rules_mk_path), self.src_dir, map(Path, self.iproj_json.include_path))
+            rules_mk.build_context = self
+            with open(rules_mk_build_path, "w") as file:
+                file.write(str(rules_mk))
 
-        rules_mk_paths = list(Path(".").rglob("Rules.mk"))
         # Create Rules.mk.build for each Rules.mk
+        executor = _get_io_executor()
+        futures = []
         for rules_mk_path in rules_mk_paths:
-            rules_mk = RulesMk.from_file(rules_mk_path,  self.src_dir, map(Path, self.iproj_json.include_path))
-            rules_mk.build_context = self
-            rules_mk_build_path = rules_mk_path.parent / ".Rules.mk.build"
-            rules_mk_build_path.write_text(str(rules_mk))
+            rules_mk_build_path = os.path.join(os.path.dirname(rules_mk_path), ".Rules.mk.build")
+            # Record the file before it is written so that it is removed even if this or another job fails
             self.tmp_files.append(rules_mk_build_path)
+            futures.append(executor.submit(create_rules_mk_build, rules_mk_path, rules_mk_build_path))
+        # Let every job finish before an error is raised, so no file is written after the clean up
+        wait(futures)
+        for future in futures:
+            future.result()
 
-        subdirs = list(map(lambda x: x.parents[0], rules_mk_paths))
+        digest = self._build_vars_digest(subdirs, project_files[".ibmi.json"])
+        build_vars = self._load_cached_build_vars(digest)
+        if build_vars is not None:
+            self._write_build_vars(build_vars)
+            return
 
-        subdirs.sort(key=lambda x: len(x.parts))
-        dir_var_map = {Path('.'): IBMiJson.from_values(self.iproj_json.tgt_ccsid, self.iproj_json.objlib)}
+        # Every subdir is "." or starts with "./", so the separator count is its depth
+        subdirs.sort(key=lambda x: x.count(os.sep))
+        dir_var_map = {".": IBMiJson.from_values(self.iproj_json.tgt_ccsid, self.iproj_json.objlib)}
 
-        def map_ibmi_json_var(path):
-            if path != Path("."):
-                dir_var_map[path] = IBMiJson.from_file(path / ".ibmi.json", dir_var_map[path.parents[0]])
+        def read_ibmi_json(path: str) -> IBMiJson:
+            return IBMiJson.from_file(os.path.join(path, ".ibmi.json"), dir_var_map[os.path.dirname(path)])
 
-        list(map(map_ibmi_json_var, subdirs))
+        # A directory inherits from its parent, so read one depth level at a time
+        levels: Dict[int, List[str]] = {}
+        for subdir in subdirs:
+            if subdir != ".":
+                levels.setdefault(subdir.count(os.sep), []).append(subdir)
+        for level in levels.values():
+            dir_var_map.update(zip(level, executor.map(read_ibmi_json, level)))
 
         # set build env variables based on iproj.json
         # if not include_path specified just use INCDIR(*NONE)
@@ -112,8 +228,7 @@ class BuildEnv:
             incdir = '\'' + '\' \''.join(include_path) + '\''
         elif len(include_path) == 1:
             incdir = include_path[0].upper()
-        with target_file_path.open("w", encoding="utf8") as file:
-            file.write(f"""# This file is generated by makei, DO NOT EDIT.
+        parts = [f"""# This file is generated by makei, DO NOT EDIT.
 # Modify .ibmi.json to override values
 
 curlib := {self.iproj_json.curlib}
@@ -125,23 +240,81 @@ doublequotedINCDIR := {incdir.replace("'", "''")}
 IBMiEnvCmd := {self.ibmi_env_cmds}
 COLOR_TTY := {'true' if self.color else 'false'}
 
-""")
-            for subdir in subdirs:
-                # print(dir_var_map[subdir].build)
-                file.write(
-                    f"TGTCCSID_{subdir.absolute()} := {dir_var_map[subdir].build['tgt_ccsid']}\n")
-                file.write(
-                    f"OBJPATH_{subdir.absolute()} := {objlib_to_path(dir_var_map[subdir].build['objlib'])}\n")
-
-            # for rules_mk in rules_mks:
-            #     with rules_mk.open('r') as rules_mk_file:
-            #         lines = rules_mk_file.readlines()
-            #         for line in lines:
-            #             line = line.rstrip()
-            #             if line and not line.startswith("#") \
-            #                     and not "=" in line and not line.startswith((' ', '\t')):
-            #                 file.write(
-            #                     f"{line.split(':')[0]}_d := {rules_mk.parents[0].absolute()}\n")
+"""]
+        src_dir = str(self.src_dir)
+        for subdir in subdirs:
+            # print(dir_var_map[subdir].build)
+            abs_subdir = os.path.normpath(os.path.join(src_dir, subdir))
+            build = dir_var_map[subdir].build
+            parts.append(f"TGTCCSID_{abs_subdir} := {build['tgt_ccsid']}\n"
+                         f"OBJPATH_{abs_subdir} := {objlib_to_path(build['objlib'])}\n")
+
+        # for rules_mk in rules_mks:
+        #     with rules_mk.open('r') as rules_mk_file:
+        #         lines = rules_mk_file.readlines()
+        #         for line in lines:
+        #             line = line.rstrip()
+        #             if line and not line.startswith("#") \
+        #                     and not "=" in line and not line.startswith((' ', '\t')):
+        #                 file.write(
+        #                     f"{line.split(':')[0]}_d := {rules_mk.parents[0].absolute()}\n")
+
+        build_vars = "".join(parts).encode("utf8")
+        self._write_build_vars(build_vars)
+        self._save_cached_build_vars(digest, build_vars)
+
+    def _write_build_vars(self, build_vars: bytes):
+        """ Writes the build vars file through the descriptor returned by mkstemp and closes it."""
+        with os.fdopen(self.build_vars_handle, "wb") as file:
+            self.build_vars_handle = None
+            file.write(build_vars)
+
+    def _build_vars_digest(self, subdirs: List[str], ibmi_json_paths: List[str]) -> str:
+        """ Returns a SHA-256 digest of every input the build vars file is generated from."""
+        digest = hashlib.sha256()
+        # A new bob version may generate the file differently
+        digest.update(f"bob {__version__}\n".encode())
+        # The generated variable names contain the absolute directory paths
+        digest.update(f"{self.src_dir}\n".encode("utf-8", "surrogateescape"))
+        digest.update(f"COLOR_TTY={self.color}\n".encode())
+        inputs = [self.iproj_json_path.read_bytes()]
+        ibmi_json_paths = set(map(os.path.normpath, ibmi_json_paths))
+        for subdir in sorted(subdirs):
+            ibmi_json_path = os.path.normpath(os.path.join(subdir, ".ibmi.json"))
+            digest.update(f"{ibmi_json_path}\n".encode("utf-8", "surrogateescape"))
+            if ibmi_json_path in ibmi_json_paths:
+                inputs.append(Path(ibmi_json_path).read_bytes())
+        for data in inputs:
+            digest.update(hashlib.sha256(data).digest())
+        # Only the environment variables referenced as &NAME can change the resolved values
+        names = {match.decode("utf-8", "surrogateescape") for data in inputs for match in _ENV_VAR_RE.findall(data)}
+        for name in sorted(names):
+            digest.update(f"{name}={os.environ.get(name)!r}\n".encode("utf-8", "surrogateescape"))
+        return digest.hexdigest()
+
+    def _load_cached_build_vars(self, digest: str) -> Optional[bytes]:
+        """ Returns the cached build vars file if it was generated from the same inputs."""
+        digest_path = self.src_dir / BUILD_VARS_DIGEST
+        cache_path = self.src_dir / BUILD_VARS_CACHE
+        try:
+            if digest_path.read_text(encoding="utf8") != digest:
+                return None
+            return cache_path.read_bytes()
+        except OSError:
+            return None
+
+    def _save_cached_build_vars(self, digest: str, build_vars: bytes):
+        """ Stores the generated build vars file along with the digest of its inputs."""
+        digest_path = self.src_dir / BUILD_VARS_DIGEST
+        cache_path = self.src_dir / BUILD_VARS_CACHE
+        try:
+            digest_path.parent.mkdir(exist_ok=True)
+            # Drop the old digest first so that it never describes a newer cache file
+            digest_path.unlink(missing_ok=True)
+            _atomic_write(cache_path, build_vars)
+            _atomic_write(digest_path, digest.encode("utf8"))
+        except OSError as error:
+            print(colored(f"Warning: Cannot cache build variables: {error}", Colors.WARNING))
 
     def make(self):
         """ Generate and execute the make command."""
@@ -159,13 +332,12 @@ COLOR_TTY := {'true' if self.color else 'false'}
                 self.success_targets.append(line.split()[1])
             print_to_stdout(line)
 
-        run_command(self.generate_make_cmd(), handle_make_output)
+        run_command(self.generate_make_argv(), handle_make_output)
         self._post_make()
         return not self.failed_targets
 
     def _post_make(self):
-        for tmp_file in self.tmp_files:
-            tmp_file.unlink()
+        self._remove_tmp_files()
         print(colored("Objects:            ", Colors.BOLD), colored(f"{len(self.failed_targets)} failed", Colors.FAIL),
               colored(f"{len(self.success_targets)} succeed", Colors.OKGREEN),
               f"{len(self.success_targets) + len(self.failed_targets)} total")
@@ -236,8 +236,9 @@ def handle_compile(args):
     # print("compile targets:"+' '.join(get_compile_targets_from_filenames(source_names)))
     targets.extend(get_compile_targets_from_filenames(source_names))
     print(colored("targets: " + ' '.join(targets), Colors.OKBLUE))
-    build_env = BuildEnv(targets, args.make_options, get_override_vars(args))
-    if build_env.make():
+    with BuildEnv(targets, args.make_options, get_override_vars(args)) as build_env:
+        success = build_env.make()
+    if success:
         sys.exit(0)
     else:
         sys.exit(1)
@@ -254,8 +255,9 @@ def handle_build(args):
         target = make_dir_target(args.subdir)
     else:
         target = "all"
-    build_env = BuildEnv([target], args.make_options, get_override_vars(args))
-    if build_env.make():
+    with BuildEnv([target], args.make_options, get_override_vars(args)) as build_env:
+        success = build_env.make()
+    if success:
         sys.exit(0)
     else:
         sys.exit(1)
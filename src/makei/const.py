@@ -1,5 +1,6 @@
 """ Constants """
 from pathlib import Path
+from types import MappingProxyType
 
 DEFAULT_TGT_CCSID = "*JOB"
 DEFAULT_OBJLIB = "*CURLIB"
@@ -32,54 +33,58 @@ TARGET_GROUPS = ["TRG",
                  "MSG"
                  ]
 
-FILE_TARGETGROUPS_MAPPING = {
-    "PGM.SQLRPGLE": "PGM",
-    "PGM.RPGLE": "PGM",
-    "PGM.CLLE": "PGM",
-    "PGM.CBLLE": "PGM",
-    "PGM.C": "PGM",
-    "PGM.SQLCBLLE": "PGM",
-    "CMDSRC": "CMD",
-    "DSPF": "DSPF",
-    "LF": "LF",
-    "PF": "PF",
-    "PRTF": "PRTF",
-    "FILE": "PF",
-    "MENUSRC": "MENU",
-    "MENU": "MENU",
-    "C": "MODULE",
-    "CPP": "MODULE",
-    "RPGLE": "MODULE",
-    "CLLE": "MODULE",
-    "CBLLE": "MODULE",
-    "SQLC": "MODULE",
-    "SQLCPP": "MODULE",
-    "SQLRPGLE": "MODULE",
-    "SQLCBLLE": "MODULE",
-    "MODULE": "PGM",
-    "CBL": "PGM",
-    "RPG": "PGM",
-    "ILEPGM": "PGM",
-    "PNLGRPSRC": "PNLGRP",
-    "PNLGRP": "PNLGRP",
-    "SQL": "QMQRY",
-    "BND": "SRVPGM",
-    "ILESRVPGM": "SRVPGM",
-    "BNDDIR": "BNDD",
-    "DTAARA": "DTAARA",
-    "DTAQ": "DTAQ",
-    "SYSTRG": "TRG",
-    "SQLPRC": "SQL",
-    "TABLE": "SQL",
-    "VIEW": "SQL",
-    "SQLSEQ": "SQL",
-    "SQLUDF": "SQL",
-    "SQLTRG": "SQL",
-    "MSGF": "MSG",
-    "WSCSTSRC": "WSCST",
-}
+# Maps each source file extension to its (target group, target object type).
+# An extension without a target object type is not recognized as a source file.
+EXTENSION_INFO = MappingProxyType({
+    "PGM.SQLRPGLE": ("PGM", "PGM"),
+    "PGM.RPGLE": ("PGM", "PGM"),
+    "PGM.CLLE": ("PGM", "PGM"),
+    "PGM.CBLLE": ("PGM", "PGM"),
+    "PGM.C": ("PGM", "PGM"),
+    "PGM.SQLCBLLE": ("PGM", "PGM"),
+    "CMDSRC": ("CMD", "CMD"),
+    "DSPF": ("DSPF", "FILE"),
+    "LF": ("LF", "FILE"),
+    "PF": ("PF", "FILE"),
+    "PRTF": ("PRTF", "FILE"),
+    "FILE": ("PF", None),
+    "MENUSRC": ("MENU", "MENU"),
+    "MENU": ("MENU", "MENU"),
+    "C": ("MODULE", "MODULE"),
+    "CPP": ("MODULE", "MODULE"),
+    "RPGLE": ("MODULE", "MODULE"),
+    "CLLE": ("MODULE", "MODULE"),
+    "CBLLE": ("MODULE", "MODULE"),
+    "SQLC": ("MODULE", "MODULE"),
+    "SQLCPP": ("MODULE", "MODULE"),
+    "SQLRPGLE": ("MODULE", "MODULE"),
+    "SQLCBLLE": ("MODULE", "MODULE"),
+    "MODULE": ("PGM", "PGM"),
+    "CBL": ("PGM", "PGM"),
+    "RPG": ("PGM", "PGM"),
+    "ILEPGM": ("PGM", "PGM"),
+    "PNLGRPSRC": ("PNLGRP", "PNLGRP"),
+    "PNLGRP": ("PNLGRP", "PNLGRP"),
+    "SQL": ("QMQRY", "QMQRY"),
+    "BND": ("SRVPGM", "SRVPGM"),
+    "ILESRVPGM": ("SRVPGM", "SRVPGM"),
+    "BNDDIR": ("BNDD", "BNDDIR"),
+    "DTAARA": ("DTAARA", "DTAARA"),
+    "DTAQ": ("DTAQ", "DTAQ"),
+    "SYSTRG": ("TRG", "PGM"),
+    "SQLPRC": ("SQL", "PGM"),
+    "TABLE": ("SQL", "FILE"),
+    "VIEW": ("SQL", "FILE"),
+    "SQLSEQ": ("SQL", "DTAARA"),
+    "SQLUDF": ("SQL", "SRVPGM"),
+    "SQLTRG": ("SQL", "PGM"),
+    "MSGF": ("MSG", "MSGF"),
+    "WSCSTSRC": ("WSCST", "WSCST"),
+})
+
+FILE_TARGETGROUPS_MAPPING = MappingProxyType({ext: info[0] for ext, info in EXTENSION_INFO.items()})
 
-TARGET_TARGETGROUPS_MAPPING = {
+TARGET_TARGETGROUPS_MAPPING = MappingProxyType({
     "CMD": "CMD",
     "FILE": "PF",
     "MENU": "MENU",
@@ -94,56 +99,17 @@ TARGET_TARGETGROUPS_MAPPING = {
     "MSGF": "MSG",
     "WSCST": "WSCST",
     "TRG": "TRG",
-}
+})
 
-FILE_TARGET_MAPPING = {
-    "PGM.SQLRPGLE": "PGM",
-    "PGM.RPGLE": "PGM",
-    "PGM.CLLE": "PGM",
-    "PGM.C": "PGM",
-    "PGM.CBLLE": "PGM",
-    "PGM.SQLCBLLE": "PGM",
-    "CMDSRC": "CMD",
-    "DSPF": "FILE",
-    "LF": "FILE",
-    "PF": "FILE",
-    "PRTF": "FILE",
-    "MENUSRC": "MENU",
-    "MENU": "MENU",
-    "C": "MODULE",
-    "CPP": "MODULE",
-    "RPGLE": "MODULE",
-    "CLLE": "MODULE",
-    "CBLLE": "MODULE",
-    "SQLC": "MODULE",
-    "SQLCPP": "MODULE",
-    "SQLRPGLE": "MODULE",
-    "SQLCBLLE": "MODULE",
-    "MODULE": "PGM",
-    "CBL": "PGM",
-    "RPG": "PGM",
-    "ILEPGM": "PGM",
-    "PNLGRPSRC": "PNLGRP",
-    "PNLGRP": "PNLGRP",
-    "SQL": "QMQRY",
-    "BND": "SRVPGM",
-    "ILESRVPGM": "SRVPGM",
-    "BNDDIR": "BNDDIR",
-    "DTAARA": "DTAARA",
-    "DTAQ": "DTAQ",
-    "SYSTRG": "PGM",
-    "SQLPRC": "PGM",
-    "TABLE": "FILE",
-    "VIEW": "FILE",
-    "SQLSEQ": "DTAARA",
-    "SQLUDF": "SRVPGM",
-    "SQLTRG": "PGM",
-    "MSGF": "MSGF",
-    "WSCSTSRC": "WSCST",
-}
+FILE_TARGET_MAPPING = MappingProxyType(
+    {ext: info[1] for ext, info in EXTENSION_INFO.items() if info[1] is not None})
 # This is the maximum number of dot seperated parts in the file extensions defined above.
 FILE_MAX_EXT_LENGTH = max(
     map(lambda ext: len(ext.split('.')), FILE_TARGET_MAPPING.keys()))
+# The file extensions above grouped by their number of dot seperated parts, longest first.
+FILE_EXTS_BY_LENGTH = tuple(
+    (length, frozenset(ext for ext in FILE_TARGET_MAPPING if ext.count('.') + 1 == length))
+    for length in range(FILE_MAX_EXT_LENGTH, 0, -1))
 
 # This is the number of lines to check in source file for member text as a comment.
 MEMBER_TEXT_LINES = 15
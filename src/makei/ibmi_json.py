@@ -3,10 +3,10 @@
 
 import json
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Union
 
 from makei.const import DEFAULT_TGT_CCSID, DEFAULT_OBJLIB
-from makei.utils import parse_all_variables
+from makei.utils import parse_all_variables, read_json_file
 
 
 class IBMiJson:
@@ -28,28 +28,27 @@ class IBMiJson:
         })
 
     @classmethod
-    def from_file(cls, file_path: Path, parent_ibm_i_json: "IBMiJson") -> "IBMiJson":
-        if file_path.exists():
-            with file_path.open() as file:
-                data = json.load(file)
-                if "version" in data:
-                    version = data["version"]
-                else:
-                    version = None
-                if "build" in data:
-                    build = data["build"]
-                    if "tgtCcsid" in build:
-                        tgt_ccsid = build["tgtCcsid"]
-                    else:
-                        tgt_ccsid = parent_ibm_i_json.build["tgt_ccsid"]
-                    if "objlib" in build:
-                        objlib = parse_all_variables(build["objlib"])
-                    else:
-                        objlib = parent_ibm_i_json.build["objlib"]
-
-                return IBMiJson(version, {"tgt_ccsid": tgt_ccsid, "objlib": objlib})
-        else:
+    def from_file(cls, file_path: Union[str, Path], parent_ibm_i_json: "IBMiJson") -> "IBMiJson":
+        try:
+            data = read_json_file(file_path)
+        except FileNotFoundError:
             return parent_ibm_i_json.copy()
+        if "version" in data:
+            version = data["version"]
+        else:
+            version = None
+        if "build" in data:
+            build = data["build"]
+            if "tgtCcsid" in build:
+                tgt_ccsid = build["tgtCcsid"]
+            else:
+                tgt_ccsid = parent_ibm_i_json.build["tgt_ccsid"]
+            if "objlib" in build:
+                objlib = parse_all_variables(build["objlib"])
+            else:
+                objlib = parent_ibm_i_json.build["objlib"]
+
+        return IBMiJson(version, {"tgt_ccsid": tgt_ccsid, "objlib": objlib})
 
     def __dict__(self):
         build = {}
@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import copy
 import json
 import sys
 from pathlib import Path
 from typing import Dict, List, Optional, Union
 
 from makei.const import DEFAULT_CURLIB, DEFAULT_OBJLIB
-from makei.utils import parse_all_variables, Colors, colored
+from makei.utils import parse_all_variables, read_json_file, Colors, colored
 
 JsonType = Union[None, int, str, bool, List["JsonType"], Dict["JsonType", "JsonType"]]
 
@@ -66,40 +67,40 @@ class IProjJson:
             return default_value
 
         try:
-            with file_path.open() as file:
-                iproj_json = json.load(file)
-                objlib = parse_all_variables(with_default_value(
-                    "objlib", DEFAULT_OBJLIB, iproj_json))
-                curlib = parse_all_variables(with_default_value(
-                    "curlib", DEFAULT_CURLIB, iproj_json))
-                if objlib == "*CURLIB":
-                    if curlib == "*CRTDFT":
-                        objlib = "QGPL"
-                    else:
-                        objlib = curlib
-
-                pre_usr_libl = list(map(parse_all_variables, with_default_value("preUsrlibl", [], iproj_json)))
-
-                post_usr_libl = list(map(parse_all_variables, with_default_value("postUsrlibl", [], iproj_json)))
-                include_path = list(map(parse_all_variables, with_default_value("includePath", [], iproj_json)))
-
-                tgt_ccsid = with_default_value("tgtCcsid", "*JOB", iproj_json)
-                set_ibm_i_env_cmd = list(map(parse_all_variables, with_default_value("setIBMiEnvCmd", [], iproj_json)))
-                extensions = with_default_value("extensions", {}, iproj_json)
-                return IProjJson(
-                    description=with_default_value("description", "", iproj_json),
-                    version=with_default_value("version", None, iproj_json),
-                    license=with_default_value("license", "", iproj_json),
-                    repository=with_default_value("repository", None, iproj_json),
-                    include_path=include_path,
-                    objlib=objlib,
-                    curlib=curlib,
-                    pre_usr_libl=pre_usr_libl,
-                    post_usr_libl=post_usr_libl,
-                    set_ibm_i_env_cmd=set_ibm_i_env_cmd,
-                    tgt_ccsid=tgt_ccsid,
-                    extensions=extensions
-                )
+            iproj_json = read_json_file(file_path)
+            objlib = parse_all_variables(with_default_value(
+                "objlib", DEFAULT_OBJLIB, iproj_json))
+            curlib = parse_all_variables(with_default_value(
+                "curlib", DEFAULT_CURLIB, iproj_json))
+            if objlib == "*CURLIB":
+                if curlib == "*CRTDFT":
+                    objlib = "QGPL"
+                else:
+                    objlib = curlib
+
+            pre_usr_libl = list(map(parse_all_variables, with_default_value("preUsrlibl", [], iproj_json)))
+
+            post_usr_libl = list(map(parse_all_variables, with_default_value("postUsrlibl", [], iproj_json)))
+            include_path = list(map(parse_all_variables, with_default_value("includePath", [], iproj_json)))
+
+            tgt_ccsid = with_default_value("tgtCcsid", "*JOB", iproj_json)
+            set_ibm_i_env_cmd = list(map(parse_all_variables, with_default_value("setIBMiEnvCmd", [], iproj_json)))
+            # The decoded file is cached, so keep a private copy of the nested object
+            extensions = copy.deepcopy(with_default_value("extensions", {}, iproj_json))
+            return IProjJson(
+                description=with_default_value("description", "", iproj_json),
+                version=with_default_value("version", None, iproj_json),
+                license=with_default_value("license", "", iproj_json),
+                repository=with_default_value("repository", None, iproj_json),
+                include_path=include_path,
+                objlib=objlib,
+                curlib=curlib,
+                pre_usr_libl=pre_usr_libl,
+                post_usr_libl=post_usr_libl,
+                set_ibm_i_env_cmd=set_ibm_i_env_cmd,
+                tgt_ccsid=tgt_ccsid,
+                extensions=extensions
+            )
         except FileNotFoundError:
             print(colored("iproj.json not found!", Colors.FAIL))
             sys.exit(1)
@@ -14,6 +14,12 @@ from makei.utils import decompose_filename, is_source_file, check_keyword_in_fil
 if TYPE_CHECKING:
     from makei.build import BuildEnv
 
+# A rule is a target line followed by its indented recipe lines
+_RULE_RE = re.compile(
+    r"^(?P<target>\S+)[ \t]*:(?!=)[ \t]*(?P<dependencies>(?:[^\n]*)*)\n" +
+    r"(?P<cmds>(?:[^\S\r\n]+?\S[^\n]*\n?|\s*\n)*)$")
+_LEADING_SPACE_RE = re.compile(r"\s")
+
 
 class MKRule:
     """Class representing a make rule"""
@@ -120,10 +126,7 @@ class MKRule:
         >>> str(rule)
         'target : dependency1 dependency2\n\tcommand1 param1 param2\n\tcommand2 param3 param4\n'
         """
-        rule_regex = re.compile(
-            r"^(?P<target>\S+)[ \t]*:(?!=)[ \t]*(?P<dependencies>(?:[^\n]*)*)\n" +
-            r"(?P<cmds>(?:[^\S\r\n]+?\S[^\n]*\n?|\s*\n)*)$")
-        target_match = rule_regex.match(rule_str)
+        target_match = _RULE_RE.match(rule_str)
         if target_match:
             target = target_match.group("target")
             dependencies = target_match.group("dependencies").split()
@@ -214,7 +217,7 @@ class RulesMk:
 
         for line in rules_mk_str.split('\n'):
             if recipe_env:
-                if re.match(r'\s', line):
+                if _LEADING_SPACE_RE.match(line):
                     recipe_str += line + '\n'
                     continue
 
@@ -6,19 +6,26 @@
 
 """ The utility module"""
 
+import functools
 import json
 import os
+import shlex
 import subprocess
 import sys
 import copy
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from shutil import move, copymode
-from tempfile import mkstemp, gettempdir
-from typing import Callable, List, Optional, Tuple, Union
+from tempfile import gettempdir
+from typing import Any, Callable, List, Optional, Tuple, Union
 
-from makei.const import FILE_MAX_EXT_LENGTH, FILE_TARGET_MAPPING, COMMENT_STYLES
+from makei.const import FILE_EXTS_BY_LENGTH, FILE_TARGET_MAPPING, COMMENT_STYLES
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional, the standard json module is used when it is not installed
+    orjson = None
 
 
 class Colors(str, Enum):
@@ -152,6 +159,23 @@ def validate_ccsid(ccsid: str):
         return False
 
 
+@functools.lru_cache(maxsize=512)
+def _load_json_file(file_path: str, _dev: int, _ino: int, _mtime_ns: int, _size: int) -> Any:
+    with open(file_path, "rb") as file:
+        data = file.read()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def read_json_file(file_path: Union[str, Path]) -> Any:
+    """ Returns the decoded content of a JSON file.
+        The result is cached until the file changes, so it must not be modified.
+    """
+    stat = os.stat(file_path)
+    return _load_json_file(os.fspath(file_path), stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
 def create_ibmi_json(ibmi_json_path: Path, tgt_ccsid: str = None, version: str = None, objlib: str = None):
     """ Creates the .ibmi.json file with the given parameters.
     """
@@ -184,28 +208,35 @@ def print_to_stdout(line: Union[str, bytes]):
     sys.stdout.buffer.flush()
 
 
-def run_command(cmd: str, stdout_handler: Callable[[bytes], None] = print_to_stdout, echo_cmd: bool = True) -> int:
-    """ Run a command in a shell environment and redirect its stdout and stderr
-        and returns the exit code
+def run_command(cmd: Union[str, List[str]], stdout_handler: Callable[[bytes], None] = print_to_stdout,
+                echo_cmd: bool = True) -> int:
+    """ Run a command and redirect its stdout and stderr and returns the exit code
 
     Args:
-        cmd (str): The command to run
+        cmd (Union[str, List[str]]): The command to run, a string is run in a bash shell
+            while a list is run directly as the program arguments
         stdout_handler (Callable[[bytes], None]]): the handle function to process the stdout
     """
+    if isinstance(cmd, str):
+        args = ["bash", "-c", cmd]
+    else:
+        args = cmd
+        cmd = shlex.join(cmd)
     if echo_cmd:
         print(colored(f"> {cmd}", Colors.OKGREEN))
     sys.stdout.flush()
+    process = None
     try:
         # pylint: disable=consider-using-with
-        process = subprocess.Popen(
-            ["bash", "-c", cmd], stdout=subprocess.PIPE, )
+        process = subprocess.Popen(args, stdout=subprocess.PIPE, )
         for line in iter(process.stdout.readline, b''):
             stdout_handler(line)
         return process.wait()
     except FileNotFoundError as error:
         print(colored(f'Cannot find command {error.filename}!', Colors.FAIL))
     finally:
-        process.kill()
+        if process is not None:
+            process.kill()
 
 
 def decompose_filename(filename: str) -> Tuple[str, Optional[str], str, str]:
@@ -232,10 +263,9 @@ def decompose_filename(filename: str) -> Tuple[str, Optional[str], str, str]:
 
     parts = os.path.basename(filename).split(".")
 
-    ext_len = FILE_MAX_EXT_LENGTH
-    while ext_len > 0:
+    for ext_len, exts in FILE_EXTS_BY_LENGTH:
         base, ext = '.'.join(parts[:-ext_len]), '.'.join(parts[-ext_len:]).upper()
-        if ext in FILE_TARGET_MAPPING:
+        if ext in exts:
             # Split the object name and text attributes
             if len(base.split("-")) == 2:
                 name, text_attribute = base.split("-")
@@ -243,9 +273,7 @@ def decompose_filename(filename: str) -> Tuple[str, Optional[str], str, str]:
                 name = base
                 text_attribute = None
             return name, text_attribute, ext, os.path.dirname(filename)
-        ext_len -= 1
-    if ext_len == 0:
-        raise ValueError(f"Cannot decomposite filename: {filename} as {ext} is not a recognized file extension")
+    raise ValueError(f"Cannot decomposite filename: {filename} as {ext} is not a recognized file extension")
 
 
 def is_source_file(filename: str) -> bool:
@@ -307,18 +335,16 @@ def format_datetime(d: datetime) -> str:
 
 
 def replace_file_content(file_path: Path, replace: Callable[[str], str]):
-    # Create temp file
-    fd, abs_path = mkstemp()
-    with os.fdopen(fd, 'w') as new_file:
-        with open(file_path, encoding="utf-8") as old_file:
-            for line in old_file:
-                new_file.write(replace(line))
-    # Copy the file permissions from the old file to the new file
-    copymode(file_path, abs_path)
-    # Remove original file
-    os.remove(file_path)
-    # Move new file
-    move(abs_path, file_path)
+    """ Applies replace to every line of the file and rewrites it in place,
+        the file is left untouched if no line was changed.
+    """
+    with open(file_path, "r+", encoding="utf-8") as file:
+        lines = file.readlines()
+        new_lines = list(map(replace, lines))
+        if new_lines != lines:
+            file.seek(0)
+            file.writelines(new_lines)
+            file.truncate()
 
 
 def make_include_dirs_absolute(job_log_path: str, parameters: str):
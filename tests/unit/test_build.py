@@ -0,0 +1,218 @@
+import os
+import tempfile
+
+import pytest
+
+import makei.build
+
+from makei.build import BUILD_VARS_CACHE, BuildEnv, _scan_project
+
+
+def test_scan_project(tmp_path):
+    (tmp_path / "QRPGLESRC" / "nested").mkdir(parents=True)
+    (tmp_path / "QDDSSRC").mkdir()
+    (tmp_path / "Rules.mk").touch()
+    (tmp_path / "QRPGLESRC" / "Rules.mk").touch()
+    (tmp_path / "QRPGLESRC" / "nested" / "Rules.mk").touch()
+    (tmp_path / "QDDSSRC" / "rules.mk.bak").touch()
+    (tmp_path / ".git" / "refs").mkdir(parents=True)
+    (tmp_path / ".git" / "refs" / "Rules.mk").touch()
+    (tmp_path / "QRPGLESRC" / ".ibmi.json").touch()
+
+    root = str(tmp_path)
+    result = _scan_project(root)
+    assert sorted(result["Rules.mk"]) == sorted([
+        os.path.join(root, "Rules.mk"),
+        os.path.join(root, "QRPGLESRC", "Rules.mk"),
+        os.path.join(root, "QRPGLESRC", "nested", "Rules.mk"),
+    ])
+    assert result[".ibmi.json"] == [os.path.join(root, "QRPGLESRC", ".ibmi.json")]
+
+
+def test_scan_project_skips_unreadable_dirs(tmp_path, monkeypatch):
+    (tmp_path / "locked").mkdir()
+    (tmp_path / "locked" / "Rules.mk").touch()
+    (tmp_path / "QRPGLESRC").mkdir()
+    (tmp_path / "QRPGLESRC" / "Rules.mk").touch()
+    (tmp_path / "Rules.mk").touch()
+
+    scandir = os.scandir
+    locked = str(tmp_path / "locked")
+
+    def scandir_locked(path):
+        # chmod 000 has no effect when the tests run as root
+        if path == locked:
+            raise PermissionError(13, "Permission denied", path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", scandir_locked)
+    result = _scan_project(str(tmp_path))
+    assert sorted(result["Rules.mk"]) == sorted([
+        str(tmp_path / "Rules.mk"),
+        str(tmp_path / "QRPGLESRC" / "Rules.mk"),
+    ])
+
+
+def test_build_vars_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "iproj.json").write_text('{"objlib": "MYLIB", "tgtCcsid": "37"}')
+    (tmp_path / "Rules.mk").touch()
+    (tmp_path / "QRPGLESRC").mkdir()
+    (tmp_path / "QRPGLESRC" / "Rules.mk").touch()
+    (tmp_path / "QRPGLESRC" / ".ibmi.json").write_text('{"build": {"objlib": "OTHERLIB"}}')
+    (tmp_path / "QRPGLESRC" / "nested").mkdir()
+    (tmp_path / "QRPGLESRC" / "nested" / "Rules.mk").touch()
+
+    with BuildEnv() as build_env:
+        build_vars = build_env.build_vars_path.read_text()
+    assert not build_env.build_vars_path.exists()
+    assert f"OBJPATH_{tmp_path} := /QSYS.LIB/MYLIB.LIB\n" in build_vars
+    assert f"OBJPATH_{tmp_path / 'QRPGLESRC'} := /QSYS.LIB/OTHERLIB.LIB\n" in build_vars
+    assert f"OBJPATH_{tmp_path / 'QRPGLESRC' / 'nested'} := /QSYS.LIB/OTHERLIB.LIB\n" in build_vars
+    assert (tmp_path / BUILD_VARS_CACHE).read_text() == build_vars
+
+    # Unchanged inputs reuse the cached file
+    (tmp_path / BUILD_VARS_CACHE).write_text(build_vars + "# cached\n")
+    with BuildEnv() as build_env:
+        assert build_env.build_vars_path.read_text() == build_vars + "# cached\n"
+
+    # Any change to an .ibmi.json regenerates it
+    (tmp_path / "QRPGLESRC" / ".ibmi.json").write_text('{"build": {"objlib": "NEWERLIB"}}')
+    with BuildEnv() as build_env:
+        build_vars = build_env.build_vars_path.read_text()
+    assert f"OBJPATH_{tmp_path / 'QRPGLESRC'} := /QSYS.LIB/NEWERLIB.LIB\n" in build_vars
+
+
+def test_generate_make_argv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "iproj.json").write_text('{"objlib": "MYLIB"}')
+    (tmp_path / "Rules.mk").touch()
+
+    with BuildEnv(["dir_QRPGLESRC"], "-j4 'VAR=a b'", {"bob_path": "/path with space/bob"}) as build_env:
+        argv = build_env.generate_make_argv()
+    assert argv[:4] == ["/QOpenSys/pkgs/bin/make", "-k", f"BUILDVARSMKPATH={build_env.build_vars_path}", "-k"]
+    assert argv[4] == "BOB=/path with space/bob"
+    assert argv[-3:] == ["-j4", "VAR=a b", "dir_QRPGLESRC"]
+
+
+def test_build_vars_cache_moved_project(tmp_path, monkeypatch):
+    project_a = tmp_path / "projA"
+    (project_a / "QRPGLESRC").mkdir(parents=True)
+    (project_a / "iproj.json").write_text('{"objlib": "MYLIB"}')
+    (project_a / "QRPGLESRC" / "Rules.mk").touch()
+    monkeypatch.chdir(project_a)
+    with BuildEnv():
+        pass
+
+    project_b = tmp_path / "projB"
+    project_a.rename(project_b)
+    monkeypatch.chdir(project_b)
+    with BuildEnv() as build_env:
+        build_vars = build_env.build_vars_path.read_text()
+    assert f"OBJPATH_{project_b / 'QRPGLESRC'} := /QSYS.LIB/MYLIB.LIB\n" in build_vars
+    assert str(project_a) not in build_vars
+
+
+def test_build_vars_cache_environment(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "iproj.json").write_text('{"objlib": "&MYOBJLIB"}')
+    (tmp_path / "Rules.mk").touch()
+    monkeypatch.setenv("MYOBJLIB", "FIRSTLIB")
+    with BuildEnv():
+        pass
+
+    # Unrelated environment variables still hit the cache
+    (tmp_path / BUILD_VARS_CACHE).write_text("# cached\n")
+    monkeypatch.setenv("SSH_CONNECTION", "10.0.0.1 22 10.0.0.2 22")
+    with BuildEnv() as build_env:
+        assert build_env.build_vars_path.read_text() == "# cached\n"
+
+    # A referenced variable regenerates the file
+    monkeypatch.setenv("MYOBJLIB", "SECONDLIB")
+    with BuildEnv() as build_env:
+        build_vars = build_env.build_vars_path.read_text()
+    assert f"OBJPATH_{tmp_path} := /QSYS.LIB/SECONDLIB.LIB\n" in build_vars
+
+
+def test_no_temp_file_left_when_constructor_fails(tmp_path, monkeypatch):
+    temp_dir = tmp_path / "tmp"
+    temp_dir.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(temp_dir))
+    project = tmp_path / "project"
+    (project / "QRPGLESRC").mkdir(parents=True)
+    monkeypatch.chdir(project)
+
+    # iproj.json is missing
+    with pytest.raises(SystemExit):
+        BuildEnv()
+    assert not list(temp_dir.iterdir())
+
+    # Failure after the temporary file was created
+    (project / "iproj.json").write_text('{"objlib": "MYLIB"}')
+    (project / "QRPGLESRC" / "Rules.mk").touch()
+    (project / "QRPGLESRC" / ".ibmi.json").write_text('{"build": ')
+    with pytest.raises(ValueError):
+        BuildEnv()
+    assert not list(temp_dir.iterdir())
+    assert not (project / "QRPGLESRC" / ".Rules.mk.build").exists()
+
+
+def test_build_vars_cache_version(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "iproj.json").write_text('{"objlib": "MYLIB"}')
+    (tmp_path / "Rules.mk").touch()
+    with BuildEnv():
+        pass
+
+    # A cache written by another bob version is not reused
+    (tmp_path / BUILD_VARS_CACHE).write_text("# cached\n")
+    monkeypatch.setattr(makei.build, "__version__", "99.0.0")
+    with BuildEnv() as build_env:
+        build_vars = build_env.build_vars_path.read_text()
+    assert f"OBJPATH_{tmp_path} := /QSYS.LIB/MYLIB.LIB\n" in build_vars
+
+
+def test_repeated_builds(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "iproj.json").write_text('{"objlib": "MYLIB"}')
+    (tmp_path / "Rules.mk").touch()
+
+    for _ in range(2):
+        with BuildEnv() as build_env:
+            assert build_env.tmp_files == ["./.Rules.mk.build"]
+            assert (tmp_path / ".Rules.mk.build").exists()
+            build_env.make()
+        assert not (tmp_path / ".Rules.mk.build").exists()
+
+    # __exit__ removes the .Rules.mk.build files when make is never run
+    with BuildEnv():
+        assert (tmp_path / ".Rules.mk.build").exists()
+    assert not (tmp_path / ".Rules.mk.build").exists()
+
+
+def test_no_rules_mk_build_left_when_a_rules_mk_fails(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "iproj.json").write_text('{"objlib": "MYLIB"}')
+    for i in range(20):
+        (tmp_path / f"dir{i}").mkdir()
+        (tmp_path / f"dir{i}" / "Rules.mk").touch()
+    (tmp_path / "dir0" / "Rules.mk").write_text("TEST.UNKNOWN:\n\techo test\n")
+
+    with pytest.raises(SystemExit):
+        BuildEnv()
+    assert not list(tmp_path.glob("*/.Rules.mk.build"))
+
+
+def test_invalid_make_options(tmp_path, monkeypatch):
+    temp_dir = tmp_path / "tmp"
+    temp_dir.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(temp_dir))
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "iproj.json").write_text('{"objlib": "MYLIB"}')
+    (tmp_path / "Rules.mk").touch()
+
+    with pytest.raises(SystemExit) as exc_info:
+        BuildEnv(["all"], "'VAR=unbalanced")
+    assert exc_info.value.code == 1
+    assert not list(temp_dir.iterdir())
+    assert not (tmp_path / ".Rules.mk.build").exists()
@@ -1,4 +1,4 @@
-from makei.utils import make_include_dirs_absolute, get_compile_targets_from_filenames
+from makei.utils import make_include_dirs_absolute, get_compile_targets_from_filenames, replace_file_content
 
 
 # flake8: noqa: E501
@@ -54,3 +54,18 @@ def test_joblob_not_found():
 def test_compile_targets_from_filenames():
     expected = ['TEST.DTAARA']
     assert get_compile_targets_from_filenames(['test.DTAARA']) == expected
+
+
+def test_replace_file_content(tmp_path):
+    file_path = tmp_path / "test.evfevent"
+    file_path.write_text("line /a/b/file1\nline /a/b/file2\n", encoding="utf-8")
+    replace_file_content(file_path, lambda line: line.replace("/a/b/", ""))
+    assert file_path.read_text(encoding="utf-8") == "line file1\nline file2\n"
+
+
+def test_replace_file_content_unchanged(tmp_path):
+    file_path = tmp_path / "test.evfevent"
+    file_path.write_text("line file1\n", encoding="utf-8")
+    mtime = file_path.stat().st_mtime_ns
+    replace_file_content(file_path, lambda line: line.replace("/a/b/", ""))
+    assert file_path.stat().st_mtime_ns == mtime